@@ -2,6 +2,7 @@ import great_expectations as gx
 from great_expectations.expectations.row_conditions import Column
 import pandas as pd
 from pathlib import Path
+from derived_columns import get_stage
 
 #Setup
 context = gx.get_context()
@@ -9,6 +10,7 @@ datasource_name = "flight_data_pandas"
 asset_name = "flight_data"
 batch_def_name = "flight_data_batch"
 suite_name = "flight_data_quality_suite"
+definition_name = "flight_data_validation_definition"
 print(f"Contex type: {type(context).__name__}")
 print(f"GX version: {gx.__version__}")
 
@@ -20,15 +22,8 @@ if not DATA_PATH.exists():
     raise FileNotFoundError(f"Data file not found: {DATA_PATH}")
 
 df = pd.read_csv(DATA_PATH)
-# Convert departure_time and actual_departure from object to datetime
-df["scheduled_departure_dt"] = pd.to_datetime(
-    df["scheduled_departure"],
-    errors="coerce"
-)
-df["actual_departure_dt"] = pd.to_datetime(
-    df["actual_departure"],
-    errors="coerce"
-)
+# This script authors the suite, so add every derived column it declares
+df = get_stage(definition_name).apply(df)
 
 print("CREATING COMPREHENSIVE EXPECTATION SUITE")
 print("=" * 60)
@@ -1,6 +1,7 @@
 import great_expectations as gx
 from pathlib import Path
 import pandas as pd
+from derived_columns import prepare_batch
 
 # Setup
 GX_ROOT = Path(__file__).resolve().parents[2]
@@ -20,21 +21,20 @@ print(f"File exists: {data_path.exists()}")
 print(f"\n📊 Loading data...")
 df = pd.read_csv(data_path)
 print(f"✅ Loaded {len(df)} rows, {len(df.columns)} columns")
-df["scheduled_departure_dt"] = pd.to_datetime(
-    df["scheduled_departure"],
-    errors="coerce"
-)
-df["actual_departure_dt"] = pd.to_datetime(
-    df["actual_departure"],
-    errors="coerce"
-)
+
+# Pobierz checkpoint
+checkpoint = context.checkpoints.get("flight_data_checkpoint")
+
+# Add the derived columns the checkpoint's expectations reference. The current
+# suite checks the column list and column count, which forces every derived
+# column, so today this adds the full derived schema.
+df = prepare_batch(df, checkpoint.validation_definitions)
+print(f"✅ Prepared {len(df.columns)} columns for validation")
 
 # Run checkpoint
 print(f"\n🎯 Running checkpoint...")
 print("-" * 60)
 
-# Pobierz checkpoint
-checkpoint = context.checkpoints.get("flight_data_checkpoint")
 result = checkpoint.run(
     batch_parameters={"dataframe": df}
 )
@@ -0,0 +1,252 @@
+import operator
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Protocol, Tuple
+
+import pandas as pd
+
+# Expectations that check the table's columns as a whole. Their expected
+# schema was authored with every derived column present, so they need the
+# full derived schema even when they name only some (or none) of them.
+TABLE_SHAPE_EXPECTATIONS = {
+    "expect_table_column_count_to_equal",
+    "expect_table_column_count_to_be_between",
+    "expect_table_columns_to_match_ordered_list",
+    "expect_table_columns_to_match_set",
+}
+
+# Kwargs that name the columns an expectation reads. Expectations without any
+# of them (custom kwargs, unexpected_rows_query, ...) get every derived column.
+COLUMN_KWARGS = ("column", "column_A", "column_B", "column_list", "column_set")
+
+ARITHMETIC_OPERATORS: Dict[str, Callable] = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+}
+
+
+class DerivedColumn(Protocol):
+    """What a stage needs from a derived column declaration."""
+
+    @property
+    def sources(self) -> Tuple[str, ...]: ...
+
+    def compute(self, get: Callable[[str], pd.Series]) -> pd.Series: ...
+
+
+@dataclass(frozen=True)
+class ParseDatetime:
+    """Parse a string column into datetimes using an explicit format.
+
+    Values that don't match the format become NaT so expectations can report
+    them. With strict=True they raise instead.
+    """
+
+    source: str
+    format: str
+    strict: bool = False
+
+    @property
+    def sources(self) -> Tuple[str, ...]:
+        return (self.source,)
+
+    def compute(self, get: Callable[[str], pd.Series]) -> pd.Series:
+        raw = get(self.source)
+        parsed = pd.to_datetime(raw, format=self.format, errors="coerce")
+        if not self.strict:
+            return parsed
+        missing = raw.isna() | (raw == "")
+        unparsed = int((parsed.isna() & ~missing).sum())
+        if unparsed > 0:
+            raise ValueError(
+                f"{unparsed} values in '{self.source}' don't match format '{self.format}'"
+            )
+        return parsed
+
+
+@dataclass(frozen=True)
+class Arithmetic:
+    """Combine two columns with +, -, * or /."""
+
+    left: str
+    op: str
+    right: str
+
+    def __post_init__(self):
+        if self.op not in ARITHMETIC_OPERATORS:
+            raise ValueError(f"Unsupported operator: {self.op}")
+
+    @property
+    def sources(self) -> Tuple[str, ...]:
+        return (self.left, self.right)
+
+    def compute(self, get: Callable[[str], pd.Series]) -> pd.Series:
+        return ARITHMETIC_OPERATORS[self.op](get(self.left), get(self.right))
+
+
+@dataclass(frozen=True)
+class Cast:
+    """Cast a column to another dtype."""
+
+    source: str
+    dtype: str
+
+    @property
+    def sources(self) -> Tuple[str, ...]:
+        return (self.source,)
+
+    def compute(self, get: Callable[[str], pd.Series]) -> pd.Series:
+        return get(self.source).astype(self.dtype)
+
+
+class DerivedColumnFrame:
+    """One loaded batch plus the derived columns computed for it so far.
+
+    Bind one frame per batch and reuse it; every derived column is computed at
+    most once for the lifetime of the frame.
+    """
+
+    def __init__(self, stage: "DerivedColumnStage", df: pd.DataFrame):
+        self.stage = stage
+        self.df = df
+        self._cache: Dict[str, pd.Series] = {}
+
+    def get(self, name: str) -> pd.Series:
+        if name in self._cache:
+            return self._cache[name]
+        if name not in self.stage.columns:
+            return self.df[name]
+        series = self.stage.columns[name].compute(self.get)
+        self._cache[name] = series
+        return series
+
+    def materialize(self, names: Iterable[str]) -> pd.DataFrame:
+        wanted = set(names)
+        # Keep declaration order so ordered column-list expectations still match
+        ordered = [name for name in self.stage.columns if name in wanted]
+        return self.df.assign(**{name: self.get(name) for name in ordered})
+
+
+class DerivedColumnStage:
+    """Derived columns declared for a validation definition.
+
+    Columns are only computed when an expectation references them (directly or
+    through another derived column). Table-shape expectations and string row
+    conditions can't be narrowed down, and neither can expectations that name
+    columns through other kwargs, so they pull in every declared column.
+    """
+
+    def __init__(self, columns: Dict[str, DerivedColumn]):
+        self.columns = columns
+        self._check_for_cycles()
+
+    def _check_for_cycles(self):
+        visiting, done = set(), set()
+
+        def visit(name, path):
+            if name in done or name not in self.columns:
+                return
+            if name in visiting:
+                raise ValueError(f"Derived columns depend on themselves: {' -> '.join(path + [name])}")
+            visiting.add(name)
+            for source in self.columns[name].sources:
+                visit(source, path + [name])
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.columns:
+            visit(name, [])
+
+    def bind(self, df: pd.DataFrame) -> DerivedColumnFrame:
+        return DerivedColumnFrame(self, df)
+
+    def referenced_columns(self, expectations: Iterable) -> List[str]:
+        referenced = set()
+        for expectation in expectations:
+            config = expectation.configuration.to_json_dict()
+            kwargs = config["kwargs"]
+            if (
+                config["type"] in TABLE_SHAPE_EXPECTATIONS
+                or isinstance(kwargs.get("row_condition"), str)
+                or not any(key in kwargs for key in COLUMN_KWARGS)
+            ):
+                return list(self.columns)
+            referenced.update(_columns_in_kwargs(kwargs))
+        return [name for name in self.columns if name in referenced]
+
+    def apply(self, df: pd.DataFrame, expectations: Optional[Iterable] = None) -> pd.DataFrame:
+        """Return df with the derived columns the expectations need.
+
+        Without expectations every declared column is added.
+        """
+        if expectations is None:
+            names = list(self.columns)
+        else:
+            names = self.referenced_columns(expectations)
+        return self.bind(df).materialize(names)
+
+
+def _columns_in_kwargs(kwargs: dict) -> List[str]:
+    columns = []
+    for key in ("column", "column_A", "column_B"):
+        if isinstance(kwargs.get(key), str):
+            columns.append(kwargs[key])
+    for key in ("column_list", "column_set"):
+        columns.extend(kwargs.get(key) or [])
+    columns.extend(_columns_in_row_condition(kwargs.get("row_condition")))
+    return columns
+
+
+def _columns_in_row_condition(condition) -> List[str]:
+    if isinstance(condition, list):
+        return [name for item in condition for name in _columns_in_row_condition(item)]
+    if not isinstance(condition, dict):
+        return []
+    columns = []
+    for key, value in condition.items():
+        if key == "column" and isinstance(value, dict) and "name" in value:
+            columns.append(value["name"])
+        else:
+            columns.extend(_columns_in_row_condition(value))
+    return columns
+
+
+# ============================================
+# STAGES PER VALIDATION DEFINITION
+# ============================================
+# Departure times are written by data_generation/create_example_dataset.py
+DEPARTURE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+DERIVED_COLUMN_STAGES = {
+    "flight_data_validation_definition": DerivedColumnStage({
+        "scheduled_departure_dt": ParseDatetime("scheduled_departure", DEPARTURE_FORMAT),
+        "actual_departure_dt": ParseDatetime("actual_departure", DEPARTURE_FORMAT),
+    }),
+}
+
+
+def get_stage(definition_name: str) -> DerivedColumnStage:
+    """Derived column stage for a validation definition (empty if none declared)."""
+    return DERIVED_COLUMN_STAGES.get(definition_name, DerivedColumnStage({}))
+
+
+def prepare_batch(df: pd.DataFrame, validation_definitions: Iterable) -> pd.DataFrame:
+    """Add the derived columns every validation definition run on df needs.
+
+    Definitions sharing a stage share one bound frame, so each derived column
+    is computed once for the whole batch.
+    """
+    frames: Dict[int, DerivedColumnFrame] = {}
+    needed: Dict[int, set] = {}
+    for validation_definition in validation_definitions:
+        stage = get_stage(validation_definition.name)
+        frames.setdefault(id(stage), stage.bind(df))
+        needed.setdefault(id(stage), set()).update(
+            stage.referenced_columns(validation_definition.suite.expectations)
+        )
+    derived = {}
+    for key, frame in frames.items():
+        materialized = frame.materialize(needed[key])
+        derived.update({name: materialized[name] for name in materialized.columns if name not in df.columns})
+    return df.assign(**derived)
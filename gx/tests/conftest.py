@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Scripts import each other as top-level modules, so tests do the same
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
@@ -0,0 +1,201 @@
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from derived_columns import (
+    Arithmetic,
+    Cast,
+    DerivedColumnStage,
+    ParseDatetime,
+    get_stage,
+    prepare_batch,
+)
+
+FORMAT = "%Y-%m-%d %H:%M:%S"
+SUITE_PATH = Path(__file__).resolve().parent.parent / "expectations" / "flight_data_quality_suite.json"
+
+
+def make_expectation(type_, **kwargs):
+    config = {"type": type_, "kwargs": kwargs}
+    return SimpleNamespace(configuration=SimpleNamespace(to_json_dict=lambda: config))
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        "scheduled": ["2024-01-01 06:15:00", "2024-01-01 07:00:00", None],
+        "actual": ["2024-01-01 06:20:00", "2024-01-01 07:30:00", None],
+        "passengers": [120.0, 80.0, 95.0],
+    })
+
+
+class CountingColumn:
+    def __init__(self, inner):
+        self.inner = inner
+        self.calls = 0
+
+    @property
+    def sources(self):
+        return self.inner.sources
+
+    def compute(self, get):
+        self.calls += 1
+        return self.inner.compute(get)
+
+
+# ============================================
+# TRANSFORMS
+# ============================================
+def test_parse_datetime(df):
+    stage = DerivedColumnStage({"scheduled_dt": ParseDatetime("scheduled", FORMAT)})
+    result = stage.apply(df)
+    assert pd.api.types.is_datetime64_any_dtype(result["scheduled_dt"])
+    assert result["scheduled_dt"][0] == pd.Timestamp("2024-01-01 06:15:00")
+    assert pd.isna(result["scheduled_dt"][2])
+
+
+def test_parse_datetime_coerces_format_mismatch():
+    df = pd.DataFrame({"scheduled": ["2024-01-01T06:15:00", "2024-01-01 07:00:00", ""]})
+    stage = DerivedColumnStage({"scheduled_dt": ParseDatetime("scheduled", FORMAT)})
+    result = stage.apply(df)
+    assert result["scheduled_dt"].isna().tolist() == [True, False, True]
+
+
+def test_parse_datetime_strict_raises_on_format_mismatch():
+    df = pd.DataFrame({"scheduled": ["2024-01-01T06:15:00", "2024-01-01 07:00:00", "", None]})
+    stage = DerivedColumnStage({"scheduled_dt": ParseDatetime("scheduled", FORMAT, strict=True)})
+    with pytest.raises(ValueError, match="1 values in 'scheduled'"):
+        stage.apply(df)
+
+
+def test_arithmetic(df):
+    stage = DerivedColumnStage({
+        "scheduled_dt": ParseDatetime("scheduled", FORMAT),
+        "actual_dt": ParseDatetime("actual", FORMAT),
+        "delay": Arithmetic("actual_dt", "-", "scheduled_dt"),
+    })
+    result = stage.apply(df)
+    assert pd.api.types.is_timedelta64_dtype(result["delay"])
+    assert result["delay"][1] == pd.Timedelta(minutes=30)
+
+
+def test_arithmetic_rejects_unknown_operator():
+    with pytest.raises(ValueError, match="Unsupported operator"):
+        Arithmetic("a", "%", "b")
+
+
+def test_cast(df):
+    stage = DerivedColumnStage({"passengers_int": Cast("passengers", "int64")})
+    result = stage.apply(df)
+    assert result["passengers_int"].dtype == "int64"
+    assert result["passengers_int"].tolist() == [120, 80, 95]
+
+
+# ============================================
+# STAGE
+# ============================================
+def test_shared_dependency_computed_once(df):
+    scheduled = CountingColumn(ParseDatetime("scheduled", FORMAT))
+    actual = CountingColumn(ParseDatetime("actual", FORMAT))
+    stage = DerivedColumnStage({
+        "scheduled_dt": scheduled,
+        "actual_dt": actual,
+        "delay": Arithmetic("actual_dt", "-", "scheduled_dt"),
+        "lead": Arithmetic("scheduled_dt", "-", "actual_dt"),
+    })
+    stage.apply(df)
+    assert scheduled.calls == 1
+    assert actual.calls == 1
+
+
+def test_prepare_batch_shares_frame_across_definitions(df, monkeypatch):
+    scheduled = CountingColumn(ParseDatetime("scheduled", FORMAT))
+    stage = DerivedColumnStage({
+        "scheduled_dt": scheduled,
+        "actual_dt": ParseDatetime("actual", FORMAT),
+        "delay": Arithmetic("actual_dt", "-", "scheduled_dt"),
+    })
+    monkeypatch.setattr("derived_columns.get_stage", lambda name: stage)
+    definitions = [
+        SimpleNamespace(name="a", suite=SimpleNamespace(expectations=[
+            make_expectation("expect_column_values_to_not_be_null", column="scheduled_dt"),
+        ])),
+        SimpleNamespace(name="b", suite=SimpleNamespace(expectations=[
+            make_expectation("expect_column_values_to_not_be_null", column="delay"),
+        ])),
+    ]
+    result = prepare_batch(df, definitions)
+    assert list(result.columns) == ["scheduled", "actual", "passengers", "scheduled_dt", "delay"]
+    assert scheduled.calls == 1
+
+
+def test_only_referenced_columns_are_added(df):
+    stage = get_stage("flight_data_validation_definition")
+    df = df.rename(columns={"scheduled": "scheduled_departure", "actual": "actual_departure"})
+    result = stage.apply(df, [make_expectation("expect_column_values_to_not_be_null", column="actual_departure_dt")])
+    assert "actual_departure_dt" in result.columns
+    assert "scheduled_departure_dt" not in result.columns
+
+
+def test_cycle_is_rejected():
+    with pytest.raises(ValueError, match="a -> b -> a"):
+        DerivedColumnStage({"a": Cast("b", "int64"), "b": Cast("a", "int64")})
+
+
+# ============================================
+# REFERENCED COLUMNS
+# ============================================
+@pytest.fixture
+def stage():
+    return DerivedColumnStage({name: Cast("passengers", "int64") for name in ["a", "b", "c", "d", "e", "f"]})
+
+
+def test_referenced_columns_from_kwargs(stage):
+    expectations = [
+        make_expectation("expect_column_values_to_not_be_null", column="a"),
+        make_expectation("expect_column_pair_values_a_to_be_greater_than_b", column_A="b", column_B="c"),
+        make_expectation("expect_compound_columns_to_be_unique", column_list=["d", "passengers"]),
+        make_expectation(
+            "expect_column_values_to_be_between",
+            column="passengers",
+            row_condition={
+                "type": "and",
+                "conditions": [
+                    {"type": "comparison", "column": {"name": "e"}, "operator": "!=", "parameter": 1},
+                    {"type": "comparison", "column": {"name": "status"}, "operator": "==", "parameter": "X"},
+                ],
+            },
+        ),
+    ]
+    assert stage.referenced_columns(expectations) == ["a", "b", "c", "d", "e"]
+
+
+@pytest.mark.parametrize("expectation", [
+    make_expectation("expect_table_column_count_to_equal", value=3),
+    make_expectation("expect_table_columns_to_match_ordered_list", column_list=["a"]),
+    make_expectation("expect_table_columns_to_match_set", column_set=["a"]),
+    make_expectation("expect_column_values_to_not_be_null", column="passengers", row_condition='a > 1'),
+    make_expectation("unexpected_rows_expectation", unexpected_rows_query="SELECT * FROM {batch} WHERE a > 1"),
+])
+def test_referenced_columns_falls_back_to_all(stage, expectation):
+    assert stage.referenced_columns([expectation]) == ["a", "b", "c", "d", "e", "f"]
+
+
+def test_referenced_columns_for_flight_suite():
+    suite = json.loads(SUITE_PATH.read_text())
+    expectations = [
+        SimpleNamespace(configuration=SimpleNamespace(to_json_dict=lambda config=config: config))
+        for config in suite["expectations"]
+    ]
+    stage = get_stage("flight_data_validation_definition")
+    assert stage.referenced_columns(expectations) == ["scheduled_departure_dt", "actual_departure_dt"]
+    # Without the table-shape checks, the dict row_conditions and column pairs
+    # still find both derived columns
+    column_expectations = [
+        expectation for expectation, config in zip(expectations, suite["expectations"])
+        if not config["type"].startswith("expect_table_")
+    ]
+    assert stage.referenced_columns(column_expectations) == ["scheduled_departure_dt", "actual_departure_dt"]